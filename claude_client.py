@@ -1,19 +1,305 @@
+import argparse
 import asyncio
-import sys
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+import orjson
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
+from loop_policy import use_uvloop
 
 load_dotenv()
 
-async def main():
-    if len(sys.argv) < 2:
-        print("Usage: python claude_client.py claude_server.py")
+#MODEL = "claude-3-5-haiku-20241022"
+#MODEL = "claude-3-opus-20240229"
+MODEL = "claude-3-5-sonnet-20241022"
+MAX_TOKENS = 1000
+# Rounds of tool calls allowed per question, the last interpretation may not call tools
+MAX_TOOL_ROUNDS = 5
+
+# Static system prompts, marked for Anthropic prompt caching so each turn only pays for the new tokens
+SYSTEM_PROMPT = [{
+    "type": "text",
+    "text": "You are an F1 expert. Use tools when needed for precise data.",
+    "cache_control": {"type": "ephemeral"}
+}]
+INTERPRET_PROMPT = [{
+    "type": "text",
+    "text": "You are an F1 expert. Interpret the tool results.",
+    "cache_control": {"type": "ephemeral"}
+}]
+
+# Seconds between status checks while a Message Batch is processing
+BATCH_POLL_INTERVAL = 30
+
+# Tool results already fetched in this session, keyed on (tool name, canonical input)
+TOOL_CACHE_SIZE = 256
+# Seconds a cached tool result is reused; the servers pick up f1_data.json edits on their own
+TOOL_CACHE_TTL = 30
+tool_cache: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+
+# Answers given in this session (--cache), keyed on (normalized question, tools fingerprint)
+QA_CACHE_SIZE = 128
+# Answers are replayed for as long as the tool results they were built from
+QA_CACHE_TTL = TOOL_CACHE_TTL
+qa_cache: OrderedDict[tuple[str, str], tuple[float, list[str]]] = OrderedDict()
+# Bumped on every reload_data call so answers straddling a reload are not cached
+data_generation = 0
+
+async def call_tool_cached(session, name, tool_input):
+    """Call an MCP tool, reusing the result of an identical earlier call"""
+    global data_generation
+    if name == "reload_data":
+        # Data may change on the server: forget everything and never cache the reload itself
+        tool_cache.clear()
+        qa_cache.clear()
+        data_generation += 1
+        result = await session.call_tool(name, tool_input)
+        return result.content[0].text if result.content else "No result"
+
+    key = (name, orjson.dumps(tool_input, option=orjson.OPT_SORT_KEYS).decode())
+    entry = tool_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        tool_cache.move_to_end(key)
+        return entry[1]
+
+    result = await session.call_tool(name, tool_input)
+    text = result.content[0].text if result.content else "No result"
+    # Failures may be transient, they are never replayed
+    if not result.isError:
+        tool_cache[key] = (time.monotonic() + TOOL_CACHE_TTL, text)
+        tool_cache.move_to_end(key)
+        if len(tool_cache) > TOOL_CACHE_SIZE:
+            tool_cache.popitem(last=False)
+    return text
+
+def question_params(question, tools):
+    """messages.create arguments for the question part"""
+    return {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS,
+        "system": SYSTEM_PROMPT,
+        "messages": [{"role": "user", "content": question}],
+        "tools": tools
+    }
+
+def interpret_params(question, rounds, tools, final=False):
+    """messages.create arguments for Claude's interpretation of the tool results
+
+    rounds holds (assistant content, tool_result blocks) for each tool round so far;
+    a final interpretation must answer in text, it cannot call tools again.
+    """
+    messages = [{"role": "user", "content": question}]
+    for response_content, tool_results in rounds:
+        messages.append({"role": "assistant", "content": response_content})
+        messages.append({"role": "user", "content": tool_results})
+    params = {
+        "model": MODEL,
+        "max_tokens": MAX_TOKENS,
+        "system": INTERPRET_PROMPT,
+        "messages": messages,
+        "tools": tools
+    }
+    if final:
+        params["tool_choice"] = {"type": "none"}
+    return params
+
+async def run_tools(session, tool_uses):
+    """Run all tools of a turn concurrently and wrap their output as tool_result blocks"""
+    results = await asyncio.gather(
+        *(call_tool_cached(session, content.name, content.input) for content in tool_uses)
+    )
+    return [{
+        "type": "tool_result",
+        "tool_use_id": content.id,
+        "content": result
+    } for content, result in zip(tool_uses, results)]
+
+async def create_message(claude, params, emit, on_delta=None):
+    """messages.create, streamed to on_delta(text, new_block) as it is generated when on_delta is given
+
+    Each complete text block is passed to emit either way.
+    """
+    if on_delta is None:
+        message = await claude.messages.create(**params)
+    else:
+        async with claude.messages.stream(**params) as stream:
+            new_block = True
+            async for event in stream:
+                if event.type == "content_block_start":
+                    new_block = True
+                elif event.type == "text":
+                    on_delta(event.text, new_block)
+                    new_block = False
+            message = await stream.get_final_message()
+
+    for content in message.content:
+        if content.type == 'text':
+            emit(content.text)
+    return message
+
+async def ask(claude, session, tools, question, emit, on_delta=None):
+    """Answer one question, passing each text block to emit as soon as it is available"""
+    # The question part
+    response = await create_message(claude, question_params(question, tools), emit, on_delta)
+
+    # The answer part: text is already out, run every tool call of the turn until Claude answers
+    rounds = []
+    for round_number in range(MAX_TOOL_ROUNDS):
+        tool_uses = [content for content in response.content if content.type == 'tool_use']
+        if not tool_uses:
+            return
+        rounds.append((response.content, await run_tools(session, tool_uses)))
+
+        # Claude's interpretation, one call for all tool results of the round
+        final = round_number == MAX_TOOL_ROUNDS - 1
+        response = await create_message(
+            claude, interpret_params(question, rounds, tools, final), emit, on_delta
+        )
+
+def tools_fingerprint(tools_bytes):
+    """Short stable hash of the serialized tool definitions, changes whenever a tool signature does"""
+    return hashlib.blake2b(tools_bytes, digest_size=8).hexdigest()
+
+async def ask_cached(claude, session, tools, question, emit, on_delta=None, *, fingerprint):
+    """ask(), replaying the earlier answer when the same question was already asked with the same tools"""
+    key = (question.strip().lower(), fingerprint)
+    entry = qa_cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        qa_cache.move_to_end(key)
+        for text in entry[1]:
+            if on_delta is not None:
+                on_delta(text, True)
+            emit(text)
+        return
+
+    answer = []
+    generation = data_generation
+
+    def record(text):
+        answer.append(text)
+        emit(text)
+
+    await ask(claude, session, tools, question, record, on_delta)
+    if generation != data_generation:
         return
+    qa_cache[key] = (time.monotonic() + QA_CACHE_TTL, answer)
+    qa_cache.move_to_end(key)
+    if len(qa_cache) > QA_CACHE_SIZE:
+        qa_cache.popitem(last=False)
+
+async def run_batch(claude, session, tools, questions, concurrency=10, ask_fn=ask):
+    """Answer many questions concurrently, at most `concurrency` in flight"""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(question):
+        answer = []
+        async with sem:
+            try:
+                await ask_fn(claude, session, tools, question, answer.append)
+            except Exception as e:
+                # One failed question must not discard the answers of the others
+                answer.append(f"Error: {e}")
+        return answer
+
+    return await asyncio.gather(*(one(question) for question in questions))
+
+async def run_message_batch(claude, requests):
+    """Submit messages.create arguments as one Message Batch and wait for the messages, None for failed requests"""
+    batch = await claude.messages.batches.create(requests=[
+        {"custom_id": str(i), "params": params} for i, params in enumerate(requests)
+    ])
+    while batch.processing_status != "ended":
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        batch = await claude.messages.batches.retrieve(batch.id)
+
+    # Results come back in any order, custom_id maps them to their request
+    messages = [None] * len(requests)
+    async for entry in await claude.messages.batches.results(batch.id):
+        if entry.result.type == "succeeded":
+            messages[int(entry.custom_id)] = entry.result.message
+    return messages
+
+async def run_batch_api(claude, session, tools, questions):
+    """Answer many questions through the Message Batches API, one batch per round of calls"""
+    answers = [[] for _ in questions]
+    pending = []
+
+    responses = await run_message_batch(claude, [question_params(question, tools) for question in questions])
+    for i, response in enumerate(responses):
+        if response is None:
+            answers[i].append("Error: request failed in the message batch.")
+            continue
+        tool_uses = []
+        for content in response.content:
+            if content.type == 'text':
+                answers[i].append(content.text)
+            elif content.type == 'tool_use':
+                tool_uses.append(content)
+        if tool_uses:
+            pending.append((i, response, tool_uses))
+
+    if not pending:
+        return answers
+
+    # Tools of every question run concurrently, then all interpretations go out as a second and last batch
+    tool_results = await asyncio.gather(*(run_tools(session, tool_uses) for _, _, tool_uses in pending))
+    final_responses = await run_message_batch(claude, [
+        interpret_params(questions[i], [(response.content, results)], tools, final=True)
+        for (i, response, _), results in zip(pending, tool_results)
+    ])
+    for (i, _, _), final_response in zip(pending, final_responses):
+        if final_response is None:
+            answers[i].append("Error: request failed in the message batch.")
+            continue
+        for content in final_response.content:
+            if content.type == 'text':
+                answers[i].append(content.text)
+
+    return answers
+
+def print_answer(text):
+    """Print one complete text block"""
+    print(f"\nClaude: {text}")
+
+def print_delta(text, new_block):
+    """Print streamed text as it arrives, opening a new Claude: line for each text block"""
+    if new_block:
+        print("\nClaude: ", end="")
+    print(text, end="", flush=True)
+
+def ignore_answer(text):
+    """emit for streamed answers, already printed by print_delta"""
+
+def load_questions(path):
+    """Questions from a .jsonl file, one JSON string or {"question": ...} object per line"""
+    questions = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            questions.append(entry["question"] if isinstance(entry, dict) else entry)
+    return questions
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ask Claude F1 questions answered with an MCP server's tools")
+    parser.add_argument("server", help="MCP server script, e.g. claude_server.py")
+    parser.add_argument("--batch", metavar="PATH", help="answer the questions of a .jsonl file instead of chatting")
+    parser.add_argument("--concurrency", type=int, default=10, help="questions in flight at once in --batch mode")
+    parser.add_argument("--use-batch-api", action="store_true",
+                        help="send --batch questions through the Message Batches API (cheaper, slower)")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="print each answer only once it is complete instead of as it is generated")
+    parser.add_argument("--cache", action="store_true",
+                        help="replay the earlier answer when a question is asked again (not with --use-batch-api)")
+    args = parser.parse_args()
 
     # Connect to MCP server
-    server_params = StdioServerParameters(command="python", args=[sys.argv[1]])
+    server_params = StdioServerParameters(command="python", args=[args.server])
     async with stdio_client(server_params) as (stdio, write):
         async with ClientSession(stdio, write) as session:
             await session.initialize()
@@ -25,56 +311,53 @@ async def main():
                 "description": tool.description,
                 "input_schema": tool.inputSchema
             } for tool in tools_response.tools]
+            # Cache breakpoint after the last tool caches the whole tools block
+            if tools:
+                tools[-1]["cache_control"] = {"type": "ephemeral"}
+            # Frozen for the session, and serialized once for the fingerprint
+            tools = tuple(tools)
+            tools_bytes = orjson.dumps(tools, option=orjson.OPT_SORT_KEYS)
 
             print(f"Available tools: {[t['name'] for t in tools]}")
 
-            # Claude client
-            claude = Anthropic()
-
-            # Chat loop
-            while True:
-                question = input("\nF1 Question (or 'quit'): ").strip()
-                if question.lower() == 'quit':
-                    break
-
-                # Ask Claude
-                # The question part
-                response = claude.messages.create(
-                    #model="claude-3-5-haiku-20241022",
-                    #model="claude-3-opus-20240229",
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    system="You are an F1 expert. Use tools when needed for precise data.",
-                    messages=[{"role": "user", "content": question}],
-                    tools=tools
-                )
-
-                # Handle response
-                # The answer part
-                for content in response.content:
-                    if content.type == 'text':
-                        print(f"\nClaude: {content.text}")
-
-                    elif content.type == 'tool_use':
-                        # Use tool
-                        result = await session.call_tool(content.name, content.input)
-                        tool_result = result.content[0].text if result.content else "No result"
-
-                        # Claude's interpretation
-                        final_response = claude.messages.create(
-                            #model="claude-3-5-haiku-20241022",
-                            #model="claude-3-opus-20240229",
-                            model="claude-3-5-sonnet-20241022",
-                            max_tokens=1000,
-                            system="You are an F1 expert. Interpret the tool results.",
-                            messages=[
-                                {"role": "user", "content": question},
-                                {"role": "assistant", "content": [content]},
-                                {"role": "user", "content": [{"type": "tool_result", "tool_use_id": content.id, "content": tool_result}]}
-                            ]
-                        )
-
-                        print(f"\nClaude: {final_response.content[0].text}")
+            if args.cache:
+                ask_fn = functools.partial(ask_cached, fingerprint=tools_fingerprint(tools_bytes))
+            else:
+                ask_fn = ask
+
+            # Claude client, one keep-alive HTTP/2 connection pool for the whole session.
+            # Built by the SDK so it matches the HTTP library the installed anthropic release uses
+            claude = AsyncAnthropic(http_client=DefaultAsyncHttpxClient(http2=True))
+
+            try:
+                if args.batch:
+                    questions = load_questions(args.batch)
+                    if args.use_batch_api:
+                        answers = await run_batch_api(claude, session, tools, questions)
+                    else:
+                        answers = await run_batch(claude, session, tools, questions, args.concurrency, ask_fn)
+                    for question, answer in zip(questions, answers):
+                        print(f"\nF1 Question: {question}")
+                        for text in answer:
+                            print_answer(text)
+                    return
+
+                loop = asyncio.get_running_loop()
+                # Chat loop
+                while True:
+                    # Read from stdin in a worker thread so the event loop keeps running
+                    question = (await loop.run_in_executor(None, input, "\nF1 Question (or 'quit'): ")).strip()
+                    if question.lower() == 'quit':
+                        break
+
+                    if args.no_stream:
+                        await ask_fn(claude, session, tools, question, print_answer)
+                    else:
+                        await ask_fn(claude, session, tools, question, ignore_answer, print_delta)
+            finally:
+                # Also closes the shared httpx client
+                await claude.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    use_uvloop()
+    asyncio.run(main())
@@ -1,35 +1,14 @@
 from __future__ import annotations
-import json
-import os
 import sys
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, List
 from mcp.server.fastmcp import FastMCP
-
-# Configure logger to write to stderr
-logging.basicConfig(stream=sys.stderr, level=logging.INFO)
-logger = logging.getLogger("f1-server")
+import f1_core
+from loop_policy import use_uvloop
 
 # Initialize the MCP server
 mcp = FastMCP("f1-data-server")
 
-# Load F1 data from JSON file
-def load_f1_data() -> Dict[str, Any]:
-    """Load F1 data from JSON file"""
-    json_path = os.path.join(os.path.dirname(__file__), 'f1_data.json')
-    try:
-        with open(json_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        logger.error(f"f1_data.json not found at {json_path}")
-        return {"drivers": {}, "teams": {}, "circuits": {}}
-    except json.JSONDecodeError as e:
-        logger.error(f"Error parsing JSON: {e}")
-        return {"drivers": {}, "teams": {}, "circuits": {}}
-
-# Load data at startup
-F1_DATA = load_f1_data()
-
 @mcp.tool()
 async def get_driver_info(driver_id: str) -> Dict[str, Any]:
     """
@@ -41,9 +20,7 @@ async def get_driver_info(driver_id: str) -> Dict[str, Any]:
     Returns:
         Formatted driver information or error message
     """
-    if driver_id not in F1_DATA["drivers"]:
-        return {"error": f"Driver '{driver_id}' not found.", "available": list(F1_DATA['drivers'].keys())}
-    return F1_DATA["drivers"][driver_id]
+    return await f1_core.entity_info("drivers", driver_id)
 
 @mcp.tool()
 async def get_team_info(team_id: str) -> Dict[str, Any]:
@@ -56,9 +33,7 @@ async def get_team_info(team_id: str) -> Dict[str, Any]:
     Returns:
         Formatted team information or error message
     """
-    if team_id not in F1_DATA["teams"]:
-        return {"error": f"Team '{team_id}' not found.", "available": list(F1_DATA['teams'].keys())}
-    return F1_DATA["teams"][team_id]
+    return await f1_core.entity_info("teams", team_id)
 
 @mcp.tool()
 async def get_circuit_info(circuit_id: str) -> Dict[str, Any]:
@@ -71,9 +46,7 @@ async def get_circuit_info(circuit_id: str) -> Dict[str, Any]:
     Returns:
         Formatted circuit information or error message
     """
-    if circuit_id not in F1_DATA["circuits"]:
-        return {"error": f"Circuit '{circuit_id}' not found.", "available": list(F1_DATA['circuits'].keys())}
-    return F1_DATA["circuits"][circuit_id]
+    return await f1_core.entity_info("circuits", circuit_id)
 
 @mcp.tool()
 async def compare_drivers(driver1_id: str, driver2_id: str) -> Dict[str, Any]:
@@ -87,31 +60,20 @@ async def compare_drivers(driver1_id: str, driver2_id: str) -> Dict[str, Any]:
     Returns:
         Formatted comparison or error message
     """
-    if driver1_id not in F1_DATA["drivers"] or driver2_id not in F1_DATA["drivers"]:
-        return {"error": "One or both driver IDs not found."}
-
-    driver1 = F1_DATA["drivers"][driver1_id]
-    driver2 = F1_DATA["drivers"][driver2_id]
-
-    # Helper function to determine winner
-    def compare_stat(stat1: int, stat2: int) -> str:
-        if stat1 > stat2:
-            return "driver1"
-        elif stat2 > stat1:
-            return "driver2"
-        else:
-            return "equal"
-
-    return {
-        "driver1": driver1["name"],
-        "driver2": driver2["name"],
-        "comparisons": {
-            "world_championships": compare_stat(driver1["world_championships"], driver2["world_championships"]),
-            "race_wins": compare_stat(driver1["race_wins"], driver2["race_wins"]),
-            "pole_positions": compare_stat(driver1["pole_positions"], driver2["pole_positions"]),
-            "fastest_laps": compare_stat(driver1["fastest_laps"], driver2["fastest_laps"])
-        }
-    }
+    return await f1_core.compare_drivers(driver1_id, driver2_id)
+
+@mcp.tool()
+async def compare_many(pairs: List[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Compare statistics for several pairs of F1 drivers in one call.
+
+    Args:
+        pairs: List of [driver1_id, driver2_id] pairs
+
+    Returns:
+        One comparison or error message per pair, in order
+    """
+    return await f1_core.compare_many(pairs)
 
 @mcp.tool()
 async def list_all_data() -> Dict[str, Any]:
@@ -121,11 +83,8 @@ async def list_all_data() -> Dict[str, Any]:
     Returns:
         Formatted list of all available data
     """
-    return {
-        "drivers": list(F1_DATA["drivers"].keys()),
-        "teams": list(F1_DATA["teams"].keys()),
-        "circuits": list(F1_DATA["circuits"].keys())
-    }
+    await f1_core.get_data()
+    return f1_core.VIEWS.list_all
 
 @mcp.tool()
 async def reload_data(confirm: bool = False) -> str:
@@ -140,11 +99,14 @@ async def reload_data(confirm: bool = False) -> str:
     """
     if not confirm:
         return "Reload aborted: please set 'confirm=true' to reload."
-    global F1_DATA
-    F1_DATA = load_f1_data()
+    if not await f1_core.reload():
+        return "Reload failed: f1_data.json could not be loaded, the previous data is still in use."
     return "F1 data reloaded successfully."
 
 # Entry point
 if __name__ == "__main__":
+    # Configure logging to write to stderr, only when run as a server rather than imported
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO)
+    use_uvloop()
     # Run the server using stdio transport
-    mcp.run(transport='stdio')
\ No newline at end of file
+    mcp.run(transport='stdio')
@@ -1,28 +1,20 @@
 from __future__ import annotations
-import json
-import os
-from typing import Any, Dict
 from mcp.server.fastmcp import FastMCP
+import f1_core
+from loop_policy import use_uvloop
 
 # Initialize the MCP server
 mcp = FastMCP("f1-data-server")
 
-# Load F1 data from JSON file
-def load_f1_data() -> Dict[str, Any]:
-    """Load F1 data from JSON file"""
-    json_path = os.path.join(os.path.dirname(__file__), 'f1_data.json')
-    try:
-        with open(json_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
-    except FileNotFoundError:
-        print(f"Error: f1_data.json not found at {json_path}")
-        return {"drivers": {}, "teams": {}, "circuits": {}}
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON: {e}")
-        return {"drivers": {}, "teams": {}, "circuits": {}}
-
-# Load data at startup
-F1_DATA = load_f1_data()
+# compare_drivers result layouts indexed by sign(stat1 - stat2) + 1
+_CMP_FMT = ("{n2} ({s2} vs {s1})", "Equal ({s1})", "{n1} ({s1} vs {s2})")
+
+# get_info dispatch: entity_type -> (F1_DATA key, label); responses are prebuilt in f1_core.VIEWS.info_text
+_ENTITY_TYPES = {
+    "driver": ("drivers", "Driver"),
+    "team": ("teams", "Team"),
+    "circuit": ("circuits", "Circuit")
+}
 
 @mcp.tool()
 async def get_info(entity_type: str, entity_id: str) -> str:
@@ -36,57 +28,23 @@ async def get_info(entity_type: str, entity_id: str) -> str:
     Returns:
         Formatted entity information or error message
     """
+    await f1_core.get_data()
     # Validate entity type
-    if entity_type == "driver":
-        data_key = "drivers"
-        if entity_id not in F1_DATA[data_key]:
-            return f"Driver '{entity_id}' not found. Available drivers: {', '.join(F1_DATA[data_key].keys())}"
-
-        entity = F1_DATA[data_key][entity_id]
-        return f"""
-Driver: {entity['name']}
-Team: {entity['team']}
-Nationality: {entity['nationality']}
-World Championships: {entity['world_championships']}
-Race Wins: {entity['race_wins']}
-Pole Positions: {entity['pole_positions']}
-Fastest Laps: {entity['fastest_laps']}
-Current Points: {entity['current_points']}
-"""
-
-    elif entity_type == "team":
-        data_key = "teams"
-        if entity_id not in F1_DATA[data_key]:
-            return f"Team '{entity_id}' not found. Available teams: {', '.join(F1_DATA[data_key].keys())}"
-
-        entity = F1_DATA[data_key][entity_id]
-        return f"""
-Team: {entity['name']}
-Base: {entity['base']}
-Team Principal: {entity['team_principal']}
-Constructors Championships: {entity['constructors_championships']}
-Engine Supplier: {entity['engine_supplier']}
-Founded: {entity['founded']}
-"""
-
-    elif entity_type == "circuit":
-        data_key = "circuits"
-        if entity_id not in F1_DATA[data_key]:
-            return f"Circuit '{entity_id}' not found. Available circuits: {', '.join(F1_DATA[data_key].keys())}"
-
-        entity = F1_DATA[data_key][entity_id]
-        return f"""
-Circuit: {entity['name']}
-Location: {entity['location']}
-Length: {entity['length_km']} km
-Race Laps: {entity['laps']}
-Lap Record: {entity['lap_record']} by {entity['lap_record_holder']}
-First GP: {entity['first_gp']}
-"""
-
-    else:
+    entry = _ENTITY_TYPES.get(entity_type)
+    if entry is None:
         return f"Unknown entity type '{entity_type}'. Available types: driver, team, circuit"
 
+    data_key, label = entry
+    text = f1_core.VIEWS.info_text[data_key].get(entity_id)
+    if text is None:
+        entity = f1_core.VIEWS.tables[data_key].get(entity_id)
+        if entity is None:
+            return f"{label} '{entity_id}' not found. Available {data_key}: {f1_core.VIEWS.keys_csv[data_key]}"
+        # Records missing a template field are not prebuilt, formatting raises as it always did
+        return f1_core.INFO_TEMPLATES[data_key].format_map(entity)
+
+    return text
+
 @mcp.tool()
 async def compare_drivers(driver1_id: str, driver2_id: str) -> str:
     """
@@ -99,46 +57,23 @@ async def compare_drivers(driver1_id: str, driver2_id: str) -> str:
     Returns:
         Formatted comparison or error message
     """
-    if driver1_id not in F1_DATA["drivers"]:
+    await f1_core.get_data()
+    views = f1_core.VIEWS
+    i = views.driver_slot.get(driver1_id)
+    if i is None:
         return f"Driver '{driver1_id}' not found"
-    if driver2_id not in F1_DATA["drivers"]:
+    j = views.driver_slot.get(driver2_id)
+    if j is None:
         return f"Driver '{driver2_id}' not found"
 
-    driver1 = F1_DATA["drivers"][driver1_id]
-    driver2 = F1_DATA["drivers"][driver2_id]
-
-    # Helper function to determine winner
-    def compare_stat(stat1: int, stat2: int, name1: str, name2: str) -> str:
-        if stat1 > stat2:
-            return f"{name1} ({stat1} vs {stat2})"
-        elif stat2 > stat1:
-            return f"{name2} ({stat2} vs {stat1})"
-        else:
-            return f"Equal ({stat1})"
-
-    return f"""
-{driver1['name']} vs {driver2['name']}
-
-World Championships: {compare_stat(
-        driver1['world_championships'], driver2['world_championships'],
-        driver1['name'], driver2['name']
-    )}
-
-Race Wins: {compare_stat(
-        driver1['race_wins'], driver2['race_wins'],
-        driver1['name'], driver2['name']
-    )}
-
-Pole Positions: {compare_stat(
-        driver1['pole_positions'], driver2['pole_positions'],
-        driver1['name'], driver2['name']
-    )}
-
-Fastest Laps: {compare_stat(
-        driver1['fastest_laps'], driver2['fastest_laps'],
-        driver1['name'], driver2['name']
-    )}
-"""
+    name1, name2 = views.driver_names[i], views.driver_names[j]
+    lines = [f"\n{name1} vs {name2}\n"]
+    for _, label, column in views.stat_columns:
+        # Each stat is read once per driver
+        stat1, stat2 = column[i], column[j]
+        result = _CMP_FMT[(stat1 > stat2) - (stat1 < stat2) + 1].format(n1=name1, n2=name2, s1=stat1, s2=stat2)
+        lines.append(f"\n{label}: {result}\n")
+    return "".join(lines)
 
 @mcp.tool()
 async def list_all_data() -> str:
@@ -148,17 +83,8 @@ async def list_all_data() -> str:
     Returns:
         Formatted list of all available data
     """
-    drivers = ", ".join(F1_DATA["drivers"].keys())
-    teams = ", ".join(F1_DATA["teams"].keys())
-    circuits = ", ".join(F1_DATA["circuits"].keys())
-
-    return f"""
-Drivers: {drivers}
-
-Teams: {teams}
-
-Circuits: {circuits}
-"""
+    await f1_core.get_data()
+    return f1_core.VIEWS.list_all_text
 
 @mcp.tool()
 async def reload_data() -> str:
@@ -168,11 +94,12 @@ async def reload_data() -> str:
     Returns:
         Status message
     """
-    global F1_DATA
-    F1_DATA = load_f1_data()
+    if not await f1_core.reload():
+        return "Reload failed: f1_data.json could not be loaded, the previous data is still in use."
     return "F1 data reloaded successfully from f1_data.json"
 
 # Entry point
 if __name__ == "__main__":
+    use_uvloop()
     # Run the server using stdio transport
     mcp.run(transport='stdio')
\ No newline at end of file
@@ -0,0 +1,378 @@
+from __future__ import annotations
+import asyncio
+import mmap
+import orjson
+import os
+import logging
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+# Shared by every server module: data loading, hot reload and the views precomputed from F1_DATA.
+# Views are rebuilt on reload, so servers read them as f1_core.VIEWS.name rather than importing VIEWS.
+logger = logging.getLogger("f1-server")
+
+F1_DATA_PATH = os.path.join(os.path.dirname(__file__), 'f1_data.json')
+
+# Load F1 data from JSON file
+def load_f1_data() -> Dict[str, Any]:
+    """Load F1 data from JSON file; raises OSError or orjson.JSONDecodeError"""
+    with open(F1_DATA_PATH, 'rb') as file:
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty or unmappable file, fall back to a plain read
+            return orjson.loads(file.read())
+        # Parse straight from the page cache, no intermediate copy
+        with mapped, memoryview(mapped) as buffer:
+            return orjson.loads(buffer)
+
+def _dumps(obj: Any) -> str:
+    """Serialize a resource payload as compact JSON text"""
+    # Resources are read by MCP clients and models, not people: no indentation, fewer bytes and tokens
+    return orjson.dumps(obj).decode()
+
+# Stats compared by compare_drivers, with their display labels
+COMPARED_STATS = (
+    ("world_championships", "World Championships"),
+    ("race_wins", "Race Wins"),
+    ("pole_positions", "Pole Positions"),
+    ("fastest_laps", "Fastest Laps")
+)
+# compare_drivers winner labels indexed by sign(stat1 - stat2) + 1
+CMP = ("driver2", "equal", "driver1")
+
+# Per entity kind: singular label and the field names used by the detail resources
+ENTITY_KINDS = {
+    "drivers": ("Driver", "driver_details", "driver_id", "available_drivers"),
+    "teams": ("Team", "team_details", "team_id", "available_teams"),
+    "circuits": ("Circuit", "circuit_details", "circuit_id", "available_circuits")
+}
+
+# Fields of each list resource entry: (output field, source field, default)
+LIST_PROJECTIONS = {
+    "drivers": (
+        ("name", "name", ""),
+        ("nationality", "nationality", ""),
+        ("team", "current_team", ""),
+        ("championships", "world_championships", 0)
+    ),
+    "teams": (
+        ("name", "name", ""),
+        ("base", "base", ""),
+        ("team_chief", "team_chief", ""),
+        ("championships", "constructors_championships", 0)
+    ),
+    "circuits": (
+        ("name", "name", ""),
+        ("location", "location", ""),
+        ("country", "country", ""),
+        ("length", "length", "")
+    )
+}
+
+# Text layouts of claude_server_generic's get_info, filled with str.format_map(entity)
+INFO_TEMPLATES = {
+    "drivers": """
+Driver: {name}
+Team: {team}
+Nationality: {nationality}
+World Championships: {world_championships}
+Race Wins: {race_wins}
+Pole Positions: {pole_positions}
+Fastest Laps: {fastest_laps}
+Current Points: {current_points}
+""",
+    "teams": """
+Team: {name}
+Base: {base}
+Team Principal: {team_principal}
+Constructors Championships: {constructors_championships}
+Engine Supplier: {engine_supplier}
+Founded: {founded}
+""",
+    "circuits": """
+Circuit: {name}
+Location: {location}
+Length: {length_km} km
+Race Laps: {laps}
+Lap Record: {lap_record} by {lap_record_holder}
+First GP: {first_gp}
+"""
+}
+
+def _format_info(data_key: str, table: Mapping[str, Any]) -> Dict[str, str]:
+    """get_info text of every entity of a table that has all the template fields"""
+    template = INFO_TEMPLATES[data_key]
+    texts = {}
+    for entity_id, entity in table.items():
+        try:
+            texts[entity_id] = template.format_map(entity)
+        except (KeyError, TypeError):
+            continue
+    return texts
+
+def _freeze(data: Dict[str, Any]) -> Mapping[str, Any]:
+    """Read-only view of the loaded data and of each of its tables"""
+    # Entity records stay plain dicts: they are handed to orjson and FastMCP, which do not take mapping proxies
+    return MappingProxyType({
+        key: MappingProxyType(value) if isinstance(value, dict) else value
+        for key, value in data.items()
+    })
+
+@dataclass(frozen=True)
+class Views:
+    """Everything precomputed from one load of F1_DATA, replaced as a whole on reload"""
+    drivers: Mapping[str, Any]
+    tables: Dict[str, Mapping[str, Any]]
+    keys: Dict[str, Tuple[str, ...]]
+    ids: Dict[str, FrozenSet[str]]
+    keys_csv: Dict[str, str]
+    list_all: Dict[str, List[str]]
+    list_all_text: str
+    driver_slot: Dict[str, int]
+    driver_names: List[str]
+    stat_columns: Tuple[Tuple[str, str, List[Any]], ...]
+    list_resource_json: Dict[str, str]
+    stats_summary_json: str
+    entity_resource_json: Dict[str, Dict[str, str]]
+    info_text: Dict[str, Dict[str, str]]
+    not_found_tail: Dict[str, str]
+
+def _build_views(data: Mapping[str, Any]) -> Views:
+    """Precompute id tuples, listings and serialized resources from loaded data"""
+    drivers = data.get("drivers", {})
+    teams = data.get("teams", {})
+    circuits = data.get("circuits", {})
+
+    driver_keys = tuple(drivers)
+    team_keys = tuple(teams)
+    circuit_keys = tuple(circuits)
+    keys = {"drivers": driver_keys, "teams": team_keys, "circuits": circuit_keys}
+    ids = {data_key: frozenset(entity_ids) for data_key, entity_ids in keys.items()}
+    keys_csv = {data_key: ", ".join(ids) for data_key, ids in keys.items()}
+    list_all = {
+        "drivers": list(driver_keys),
+        "teams": list(team_keys),
+        "circuits": list(circuit_keys)
+    }
+    list_all_text = f"""
+Drivers: {keys_csv["drivers"]}
+
+Teams: {keys_csv["teams"]}
+
+Circuits: {keys_csv["circuits"]}
+"""
+
+    # compare_drivers reads stats column-wise: one list per stat, indexed by driver slot.
+    # Values are kept as loaded: a float, null or string stat can only break the compares reading it, not the load
+    driver_slot = {driver_id: slot for slot, driver_id in enumerate(driver_keys)}
+    driver_names = [driver.get("name", "N/A") for driver in drivers.values()]
+    stat_columns = tuple(
+        (stat, label, [driver.get(stat, 0) for driver in drivers.values()])
+        for stat, label in COMPARED_STATS
+    )
+
+    # List resources, one projection of every entity per table
+    list_resource_json = {
+        data_key: _dumps({
+            "resource_type": f"{data_key}_list",
+            "count": len(table),
+            data_key: [{
+                "id": entity_id,
+                **{field: entity.get(source, default) for field, source, default in LIST_PROJECTIONS[data_key]}
+            } for entity_id, entity in table.items()]
+        })
+        for data_key, table in (("drivers", drivers), ("teams", teams), ("circuits", circuits))
+    }
+
+    # Detail resources of every entity, serialized once per load
+    entity_resource_json = {
+        data_key: {
+            entity_id: _dumps({
+                "resource_type": resource_type,
+                id_field: entity_id,
+                "data": entity
+            })
+            for entity_id, entity in data.get(data_key, {}).items()
+        }
+        for data_key, (_, resource_type, id_field, _) in ENTITY_KINDS.items()
+    }
+
+    # Not-found detail resources: everything after the error message is fixed per table
+    not_found_tail = {
+        data_key: "," + _dumps({available_field: keys[data_key]})[1:]
+        for data_key, (_, _, _, available_field) in ENTITY_KINDS.items()
+    }
+
+    info_text = {
+        data_key: _format_info(data_key, table)
+        for data_key, table in (("drivers", drivers), ("teams", teams), ("circuits", circuits))
+    }
+
+    # Calculate some interesting statistics, total and leader in a single pass
+    total_championships = 0
+    most_successful_driver = None
+    for driver_id, driver_data in drivers.items():
+        championships = driver_data.get("world_championships", 0)
+        # A null or string count is left out of the summary instead of failing the whole load
+        if not isinstance(championships, (int, float)):
+            continue
+        total_championships += championships
+        if most_successful_driver is None or championships > most_successful_driver[2]:
+            most_successful_driver = (driver_id, driver_data.get("name", "N/A"), championships)
+    if most_successful_driver is None:
+        most_successful_driver = ("none", "N/A", 0)
+
+    stats_summary_json = _dumps({
+        "resource_type": "stats_summary",
+        "summary": {
+            "drivers_count": len(drivers),
+            "teams_count": len(teams),
+            "circuits_count": len(circuits),
+            "total_championships_tracked": total_championships,
+            "most_successful_driver": {
+                "id": most_successful_driver[0],
+                "name": most_successful_driver[1],
+                "championships": most_successful_driver[2]
+            }
+        }
+    })
+
+    return Views(
+        drivers=drivers,
+        tables={"drivers": drivers, "teams": teams, "circuits": circuits},
+        keys=keys,
+        ids=ids,
+        keys_csv=keys_csv,
+        list_all=list_all,
+        list_all_text=list_all_text,
+        driver_slot=driver_slot,
+        driver_names=driver_names,
+        stat_columns=stat_columns,
+        list_resource_json=list_resource_json,
+        stats_summary_json=stats_summary_json,
+        entity_resource_json=entity_resource_json,
+        info_text=info_text,
+        not_found_tail=not_found_tail
+    )
+
+def _data_mtime_ns() -> Optional[int]:
+    """Modification time of f1_data.json, None if it cannot be stat'ed"""
+    try:
+        return os.stat(F1_DATA_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+def _load() -> Tuple[Optional[int], Mapping[str, Any], Views]:
+    """Read f1_data.json and build its views; blocking, safe to run in a worker thread"""
+    # Stat before reading so a write landing mid-load is picked up on the next call
+    mtime_ns = _data_mtime_ns()
+    data = _freeze(load_f1_data())
+    return mtime_ns, data, _build_views(data)
+
+def _apply(loaded: Tuple[Optional[int], Mapping[str, Any], Views]) -> None:
+    """Publish a _load() result; runs on the event loop so handlers never see a half-swapped set of views"""
+    global F1_DATA, VIEWS, _MTIME_NS
+    _MTIME_NS, F1_DATA, VIEWS = loaded
+
+async def reload() -> bool:
+    """Reload F1_DATA from disk without blocking the event loop; False if it failed and the current data was kept"""
+    global _FAILED_MTIME_NS
+    mtime_ns = _data_mtime_ns()
+    try:
+        loaded = await asyncio.to_thread(_load)
+    except Exception as e:
+        # A half-written or broken file must not replace data that is being served
+        logger.error("Reloading %s failed, keeping the current data: %s", F1_DATA_PATH, e)
+        _FAILED_MTIME_NS = mtime_ns
+        return False
+    _apply(loaded)
+    return True
+
+async def get_data() -> Mapping[str, Any]:
+    """Return F1_DATA, reloading it first if f1_data.json changed on disk"""
+    mtime_ns = _data_mtime_ns()
+    # A version that already failed to load is retried only once the file changes again
+    if mtime_ns is not None and mtime_ns != _MTIME_NS and mtime_ns != _FAILED_MTIME_NS:
+        await reload()
+    return F1_DATA
+
+async def entity_info(data_key: str, entity_id: str, resource_errors: bool = False) -> Dict[str, Any]:
+    """Raw record of one driver/team/circuit, or an error listing the valid ids
+
+    resource_errors words the error like the detail resources do, as claude_server_resources' tools expect.
+    """
+    label, _, _, available_field = ENTITY_KINDS[data_key]
+    await get_data()
+    views = VIEWS
+    entity = views.tables[data_key].get(entity_id)
+    if entity is None:
+        if resource_errors:
+            return {"error": f"{label} '{entity_id}' not found", available_field: views.keys[data_key]}
+        return {"error": f"{label} '{entity_id}' not found.", "available": views.keys[data_key]}
+    return entity
+
+async def list_resource(data_key: str) -> str:
+    """JSON list resource of one table"""
+    await get_data()
+    return VIEWS.list_resource_json[data_key]
+
+async def entity_resource(data_key: str, entity_id: str) -> str:
+    """JSON detail resource for one driver/team/circuit"""
+    await get_data()
+    cached = VIEWS.entity_resource_json[data_key].get(entity_id)
+    if cached is not None:
+        return cached
+    # Misses only serialize their message, the available ids are prebuilt
+    message = _dumps(f"{ENTITY_KINDS[data_key][0]} '{entity_id}' not found")
+    return '{"error":' + message + VIEWS.not_found_tail[data_key]
+
+def _compare_pair(driver1_id: str, driver2_id: str) -> Dict[str, Any]:
+    """compare_drivers on the current views, without the reload check"""
+    views = VIEWS
+    i = views.driver_slot.get(driver1_id)
+    j = views.driver_slot.get(driver2_id)
+    if i is None or j is None:
+        return {"error": "One or both driver IDs not found."}
+
+    comparisons = {}
+    for stat, _, column in views.stat_columns:
+        # Each stat is read once per driver
+        stat1, stat2 = column[i], column[j]
+        comparisons[stat] = CMP[(stat1 > stat2) - (stat1 < stat2) + 1]
+
+    return {
+        "driver1": views.driver_names[i],
+        "driver2": views.driver_names[j],
+        "comparisons": comparisons
+    }
+
+async def compare_drivers(driver1_id: str, driver2_id: str) -> Dict[str, Any]:
+    """Per-stat winner between two drivers, or an error if either id is unknown"""
+    await get_data()
+    return _compare_pair(driver1_id, driver2_id)
+
+async def compare_many(pairs: List[List[str]]) -> List[Dict[str, Any]]:
+    """compare_drivers for every [driver1_id, driver2_id] pair, checking for new data only once
+
+    Results line up with pairs: a malformed pair gets an error entry in its own position.
+    """
+    await get_data()
+    return [
+        _compare_pair(*pair) if len(pair) == 2 else {"error": "Each pair must contain exactly two driver IDs."}
+        for pair in pairs
+    ]
+
+# mtime of the last f1_data.json version that failed to load
+_FAILED_MTIME_NS: Optional[int] = None
+
+# Load data once per process; every server module shares it
+try:
+    _MTIME_NS, F1_DATA, VIEWS = _load()
+except Exception as e:
+    # Only the first load falls back to empty tables, later failures keep the data already loaded
+    logger.error("Loading %s failed, starting with no data: %s", F1_DATA_PATH, e)
+    _MTIME_NS, _FAILED_MTIME_NS = None, _data_mtime_ns()
+    F1_DATA = _freeze({"drivers": {}, "teams": {}, "circuits": {}})
+    VIEWS = _build_views(F1_DATA)
@@ -1,15 +1,80 @@
 
 import asyncio
 import sys
-import json
+import orjson
+import httpx
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
+from loop_policy import use_uvloop
 
 # Load API key from .env
 load_dotenv()
-client = OpenAI()
+# One keep-alive HTTP/2 connection pool for the whole session
+client = AsyncOpenAI(http_client=httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60)
+))
+
+SYSTEM_MESSAGE = {"role": "system", "content": "You are an F1 expert. Use tools for precise data."}
+# Question/answer turns kept in the conversation, older ones are dropped to stay within the context window
+MAX_HISTORY_TURNS = 10
+# Rounds of tool calls allowed per question, each one costs a follow-up API call
+MAX_TOOL_ROUNDS = 5
+
+async def stream_reply(stream):
+    """Print a streamed GPT reply as it arrives; return its text and its assembled tool calls"""
+    content = []
+    tool_calls = {}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+
+        if delta.content:
+            if not content:
+                print("\nGPT: ", end="")
+            print(delta.content, end="", flush=True)
+            content.append(delta.content)
+
+        # Tool calls arrive in pieces, the index says which call a piece belongs to
+        for piece in delta.tool_calls or ():
+            call = tool_calls.setdefault(piece.index, {
+                "id": "",
+                "type": "function",
+                "function": {"name": "", "arguments": ""}
+            })
+            if piece.id:
+                call["id"] = piece.id
+            if piece.function:
+                call["function"]["name"] += piece.function.name or ""
+                call["function"]["arguments"] += piece.function.arguments or ""
+
+    if content:
+        print()
+    calls = [tool_calls[index] for index in sorted(tool_calls)]
+    for call in calls:
+        # Tools without parameters may stream no arguments at all
+        call["function"]["arguments"] = call["function"]["arguments"] or "{}"
+    return "".join(content), calls
+
+def trim_history(messages):
+    """Keep the system message and the last MAX_HISTORY_TURNS turns, each starting at its user message"""
+    turn_starts = [i for i, message in enumerate(messages) if message["role"] == "user"]
+    if len(turn_starts) > MAX_HISTORY_TURNS:
+        # Whole turns are dropped so no tool result is left without its tool call
+        del messages[1:turn_starts[-MAX_HISTORY_TURNS]]
+
+async def call_tool(session, tool_call):
+    """Execute one requested tool using MCP and wrap its output as a tool message"""
+    arguments = orjson.loads(tool_call["function"]["arguments"])
+    tool_result = await session.call_tool(tool_call["function"]["name"], arguments)
+    return {
+        "role": "tool",
+        "tool_call_id": tool_call["id"],
+        "content": tool_result.content[0].text if tool_result.content else "No result"
+    }
 
 async def main():
     if len(sys.argv) < 2:
@@ -36,59 +101,74 @@ async def main():
 
             print(f"Available tools: {[t['function']['name'] for t in tools]}")
 
+            loop = asyncio.get_running_loop()
+
+            # One conversation for the whole session, each turn is appended to it and the oldest are trimmed
+            messages = [SYSTEM_MESSAGE]
+
             # Chat loop
             while True:
-                question = input("\nF1 Question (or 'quit'): ").strip()
+                # Read from stdin in a worker thread so the event loop keeps running
+                question = (await loop.run_in_executor(None, input, "\nF1 Question (or 'quit'): ")).strip()
                 if question.lower() == "quit":
                     break
 
-                # First GPT call using Responses API
-                response = client.chat.completions.create(
+                turn_start = len(messages)
+                messages.append({"role": "user", "content": question})
+
+                # First GPT call, streamed so a direct answer prints as it is generated
+                content, tool_calls = await stream_reply(await client.chat.completions.create(
                     model="gpt-4o",
                     #4.1.mini
                     tools=tools,
                     tool_choice="auto",
                     temperature=0.5,
-                    messages=[
-                        {"role": "system", "content": "You are an F1 expert. Use tools for precise data."},
-                        {"role": "user", "content": question}
-                    ]
-                )
-
-                msg = response.choices[0].message
-
-                if msg.content:
-                    # If GPT replies directly with a text answer
-                    print(f"\nGPT: {msg.content}")
-                elif msg.tool_calls:
-                    # If GPT chooses to use a tool
-                    tool_call = msg.tool_calls[0]
-                    tool_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
-
-                    # Execute the requested tool using MCP
-                    tool_result = await session.call_tool(tool_name, arguments)
-
-                    # Second GPT call with tool result included
-                    follow_up = client.chat.completions.create(
+                    messages=messages,
+                    stream=True
+                ))
+
+                # If GPT chooses to use tools, run all of them concurrently and let it chain further calls
+                tool_rounds = 0
+                while tool_calls and tool_rounds < MAX_TOOL_ROUNDS:
+                    tool_rounds += 1
+                    messages.append({"role": "assistant", "content": content or None, "tool_calls": tool_calls})
+                    messages.extend(await asyncio.gather(
+                        *(call_tool(session, tool_call) for tool_call in tool_calls)
+                    ))
+
+                    # Follow-up GPT call with tool results included
+                    content, tool_calls = await stream_reply(await client.chat.completions.create(
                         model="gpt-4o",
+                        tools=tools,
+                        tool_choice="auto",
                         temperature=0.5,
-                        messages=[
-                            {"role": "system", "content": "You are an F1 expert. Use tools for precise data."},
-                            {"role": "user", "content": question},
-                            {"role": "assistant", "tool_calls": [tool_call]},
-                            {
-                                "role": "tool",
-                                "tool_call_id": tool_call.id,
-                                "content": tool_result.content[0].text if tool_result.content else "No result"
-                            }
-                        ]
-                    )
-
-                    print(f"\nGPT: {follow_up.choices[0].message.content}")
+                        messages=messages,
+                        stream=True
+                    ))
+
+                if tool_calls:
+                    print(f"\nGPT was still requesting tools after {MAX_TOOL_ROUNDS} rounds, giving up on this question.")
+                    # Drop the unanswered turn so the conversation stays well-formed
+                    del messages[turn_start:]
+                elif content:
+                    messages.append({"role": "assistant", "content": content})
+                    trim_history(messages)
                 else:
                     # Fallback message in case GPT returns nothing
-                    print("\nGPT response was empty and did not include any tool calls.")
+                    if len(messages) > turn_start + 1:
+                        print("\nGPT response was empty after the tool calls.")
+                    else:
+                        print("\nGPT response was empty and did not include any tool calls.")
+                    # Drop the unanswered turn so the conversation stays well-formed
+                    del messages[turn_start:]
+
+async def run():
+    try:
+        await main()
+    finally:
+        # Also closes the shared httpx client
+        await client.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    use_uvloop()
+    asyncio.run(run())
@@ -0,0 +1,11 @@
+import asyncio
+
+# Event loop setup shared by the servers and clients; kept apart from f1_core so importing it loads no data
+
+def use_uvloop() -> None:
+    """Run the event loop on uvloop when it is installed, the default asyncio loop otherwise"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())